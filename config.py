@@ -10,9 +10,45 @@ TAB_CRYPTO = "Crypto"
 TAB_STOCK_TW = "Stock_TW"     # Taiwan stocks
 TAB_STOCK_VN = "Stock_VN"     # Vietnam stocks
 TAB_HISTORY = "history"
+TAB_HISTORY_STATE = "history_state"   # Last emitted state per symbol/TF
+TAB_TRANSITIONS = "transitions"       # Signal flips only
 TAB_DASHBOARD_STOCK_TW = "Dashboard_Stock_TW"
 TAB_DASHBOARD_STOCK_VN = "Dashboard_Stock_VN"
 TAB_DASHBOARD_CRYPTO = "Dashboard_Crypto"
+TAB_UNRESOLVED = "unresolved"         # Config rows that fail to resolve
+TAB_SYMBOL_CACHE = "symbol_cache"     # Symbol resolution + negative cache
+
+# === GOOGLE SHEETS QUOTAS (requests per minute, per user) ===
+SHEETS_READ_QUOTA_PER_MIN = 60
+SHEETS_WRITE_QUOTA_PER_MIN = 60
+SHEETS_MAX_RETRIES = 5
+
+# === HISTORY (change-only logging) ===
+# A row is appended to history only if signal or confidence changed,
+# or price moved more than this percentage since the last emitted row
+HISTORY_PRICE_TOLERANCE_PCT = 0.5
+
+# === REFRESH PRIORITY ===
+# Max TradingView requests (one per symbol/timeframe) spent per run
+REFRESH_REQUEST_BUDGET = 200
+# Base tier per timeframe (1 = hottest)
+TIMEFRAME_BASE_TIER = {"4H": 1, "1D": 2, "1W": 3, "1M": 3}
+# Max age in hours before an entry of each tier is due for refresh
+# (runs are 4-13h apart: tier 1 every run, tier 2 about twice a day, tier 3 every ~2 days)
+REFRESH_TIER_MAX_AGE_HOURS = {1: 3, 2: 12, 3: 48}
+RSI_TRIGGER_BAND = 3            # RSI points before a signal threshold is crossed
+PRICE_TRIGGER_BAND_PCT = 1.0    # % distance of close before the S1/R1 trigger, or from EMA200
+VOLATILITY_PCT = 5.0            # |close - EMA20| / EMA20 above this = volatile
+HOT_CONFIDENCE = 75
+
+# === SYMBOL RESOLUTION CACHE ===
+# Known-bad (symbol, exchange, screener) entries are re-checked after
+# BASE * 2^(failures-1) hours, capped at MAX
+NEGATIVE_CACHE_BASE_HOURS = 6
+NEGATIVE_CACHE_MAX_HOURS = 168
+
+# Timestamp format for all Time(TW)/Updated columns
+TS_FORMAT = "%Y-%m-%d %H:%M"
 
 # === GLOBAL VARIABLES (populated from Google Sheet ONLY) ===
 CRYPTO_COINS = []
@@ -21,18 +57,29 @@ STOCK_COINS_VN = []    # Vietnam stocks
 FOREX_METALS = []
 
 
-def load_config_from_sheet(ss):
+# Written to a new 'config' tab so users can see the expected format
+CONFIG_EXAMPLE = [
+    ["Symbol", "Name", "Exchange", "Screener"],
+    ["BTCUSDT", "Bitcoin", "BINANCE", "crypto"],
+    ["ETHUSDT", "Ethereum", "BINANCE", "crypto"],
+    ["XAUUSD", "Gold", "OANDA", "cfd"],
+    ["2330", "TSMC", "TWSE", "taiwan"],
+    ["2455", "Visual Photonics", "TWSE", "taiwan"],
+    ["BSR", "Binh Son Refining", "HOSE", "vietnam"],
+    ["FPT", "FPT Corp", "HOSE", "vietnam"],
+]
+
+
+def load_config_from_rows(all_rows):
     """
-    Load configuration from Google Sheet 'config' tab
+    Parse rows of the Google Sheet 'config' tab (read by sheets_writer.read_config_rows)
     Now separates Taiwan and Vietnam stocks into different lists
+    Returns: (crypto, stock_tw, stock_vn, forex) lists, also set as globals
     """
     global CRYPTO_COINS, STOCK_COINS_TW, STOCK_COINS_VN, FOREX_METALS
 
     try:
         print("📋 Loading config from Google Sheet 'config' tab...")
-        ws = ss.worksheet(TAB_CONFIG)
-        all_rows = ws.get_all_values()
-
         if len(all_rows) < 2:
             raise Exception("Config tab is empty or only has header")
 
@@ -135,32 +182,9 @@ def load_config_from_sheet(ss):
         if not CRYPTO_COINS and not STOCK_COINS_TW and not STOCK_COINS_VN:
             raise Exception("No valid symbols loaded from config tab!")
 
+        return CRYPTO_COINS, STOCK_COINS_TW, STOCK_COINS_VN, FOREX_METALS
+
     except Exception as e:
         print(f"❌ Error reading config tab: {e}")
         raise RuntimeError(f"Cannot load config from Google Sheet: {e}")
 
-
-def ensure_config_tab(ss):
-    """Create config tab if it doesn't exist"""
-    try:
-        ws = ss.worksheet(TAB_CONFIG)
-        print(f"✅ Config tab exists")
-        return ws
-    except:
-        print(f"📝 Creating config tab with example format...")
-        ws = ss.add_worksheet(title=TAB_CONFIG, rows=100, cols=4)
-
-        example_data = [
-            ["Symbol", "Name", "Exchange", "Screener"],
-            ["BTCUSDT", "Bitcoin", "BINANCE", "crypto"],
-            ["ETHUSDT", "Ethereum", "BINANCE", "crypto"],
-            ["XAUUSD", "Gold", "OANDA", "cfd"],
-            ["2330", "TSMC", "TWSE", "taiwan"],
-            ["2455", "Visual Photonics", "TWSE", "taiwan"],
-            ["BSR", "Binh Son Refining", "HOSE", "vietnam"],
-            ["FPT", "FPT Corp", "HOSE", "vietnam"],
-        ]
-
-        ws.update("A1", example_data)
-        print(f"✅ Config tab created with example data")
-        return ws
@@ -0,0 +1,118 @@
+# history_log.py
+"""
+Change-only history logging
+Keeps a snapshot of the last emitted state per (symbol, exchange,
+screener, timeframe) in the
+'history_state' tab and only emits history rows when something changed
+"""
+from config import HISTORY_PRICE_TOLERANCE_PCT
+from refresh_priority import entry_key, row_key
+
+SNAPSHOT_HEADER = [
+    "Symbol", "Exchange", "Screener", "TF", "Asset Type",
+    "Price", "Buffett Signal", "Confidence%", "Time(TW)"
+]
+TRANSITIONS_HEADER = [
+    "Time(TW)", "Asset Type", "Symbol", "Name", "TF",
+    "From Signal", "To Signal", "From Conf%", "To Conf%", "Price"
+]
+
+
+def _to_float(value):
+    """Parse a sheet cell into float (0 if empty/invalid)"""
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def load_snapshot(all_rows):
+    """
+    Build snapshot dict from 'history_state' tab values
+    Columns are matched by header; entries without an exchange (older
+    layout) are dropped, so those rows are logged once more
+    Returns: {entry_key: {"asset_type", "price", "signal", "confidence", "time"}}
+    """
+    snapshot = {}
+    if not all_rows:
+        return snapshot
+
+    index = {str(name): i for i, name in enumerate(all_rows[0])}
+    for raw in all_rows[1:]:
+        row = [raw[index[name]] if name in index and index[name] < len(raw) else "" for name in SNAPSHOT_HEADER]
+        symbol, exchange, screener, tf = (str(v).strip() for v in row[:4])
+        if not symbol or not exchange or not tf:
+            continue
+        snapshot[entry_key(symbol, exchange, screener, tf)] = {
+            "asset_type": row[4],
+            "price": _to_float(row[5]),
+            "signal": str(row[6]),
+            "confidence": int(_to_float(row[7])),
+            "time": row[8],
+        }
+    return snapshot
+
+
+def has_changed(prev, price, signal, confidence, tolerance_pct=HISTORY_PRICE_TOLERANCE_PCT):
+    """True if signal class/confidence changed or price moved past tolerance"""
+    if prev is None:
+        return True
+    if prev["signal"] != signal or prev["confidence"] != confidence:
+        return True
+    if not prev["price"]:
+        return True
+    move_pct = abs(price - prev["price"]) / abs(prev["price"]) * 100
+    return move_pct > tolerance_pct
+
+
+def select_changes(rows, asset_type, snapshot, ts, tolerance_pct=HISTORY_PRICE_TOLERANCE_PCT):
+    """
+    Filter data rows down to those worth logging
+    Updates snapshot in place for every emitted row
+    Returns: (history_rows, transition_rows)
+    """
+    history_rows = []
+    transition_rows = []
+
+    for row in rows:
+        if row[2] == "ERROR":
+            continue
+
+        symbol, name, tf = row[0], row[1], row[2]
+        price = _to_float(row[3])
+        signal = str(row[9])
+        confidence = int(_to_float(row[10]))
+        key = row_key(row)
+        prev = snapshot.get(key)
+
+        if not has_changed(prev, price, signal, confidence, tolerance_pct):
+            continue
+
+        history_rows.append([ts, asset_type] + row)
+
+        if prev is not None and prev["signal"] != signal:
+            transition_rows.append([
+                ts, asset_type, symbol, name, tf,
+                prev["signal"], signal, prev["confidence"], confidence, row[3]
+            ])
+
+        snapshot[key] = {
+            "asset_type": asset_type,
+            "price": price,
+            "signal": signal,
+            "confidence": confidence,
+            "time": ts,
+        }
+
+    return history_rows, transition_rows
+
+
+def snapshot_table(snapshot):
+    """Convert snapshot dict back into rows for the 'history_state' tab"""
+    data = [SNAPSHOT_HEADER]
+    for (symbol, exchange, screener, tf), s in sorted(snapshot.items()):
+        data.append([
+            symbol, exchange, screener, tf, s["asset_type"],
+            s["price"], s["signal"], s["confidence"], s["time"]
+        ])
+    return data
@@ -0,0 +1,186 @@
+# refresh_priority.py
+"""
+Tiered refresh scheduling
+Each (symbol, exchange, screener, timeframe) gets a tier from its timeframe, then is promoted
+if it is volatile, about to cross a get_buffett_signal trigger, or carrying
+a high confidence signal. An entry is due once it is older than its tier's
+max age; due entries are refreshed most overdue first (age / max age) until
+the request budget runs out, so colder tiers still age into the budget.
+The rest keep their last values as STALE.
+"""
+from datetime import datetime
+
+from config import (
+    REFRESH_REQUEST_BUDGET, TIMEFRAME_BASE_TIER, REFRESH_TIER_MAX_AGE_HOURS,
+    RSI_TRIGGER_BAND, PRICE_TRIGGER_BAND_PCT, VOLATILITY_PCT, HOT_CONFIDENCE,
+    TS_FORMAT
+)
+
+# Extra columns appended after the indicator columns of every data row
+COL_UPDATED = 16
+COL_STATUS = 17
+COL_EXCHANGE = 18
+COL_SCREENER = 19
+STATUS_LIVE = "LIVE"
+STATUS_STALE = "STALE"
+STATUS_ERROR = "ERROR"
+
+# RSI thresholds used by get_buffett_signal: signals fire below the lower
+# ones (DIP BUY < 35, EXTREME VALUE < 30, STRONG BUY < 65) and above 70 (EXIT ZONE)
+RSI_LOWER_THRESHOLDS = [30, 35, 65]
+RSI_UPPER_THRESHOLDS = [70]
+
+
+def _num(value):
+    """Parse a sheet cell into float (None if empty/invalid)"""
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def _near(value, target, band_pct):
+    return value and target and abs(value - target) / abs(target) * 100 <= band_pct
+
+
+def _rsi_near_trigger(rsi):
+    """RSI within the band on the side it has to cross to trigger a signal"""
+    if rsi is None:
+        return False
+    return (
+        any(t <= rsi < t + RSI_TRIGGER_BAND for t in RSI_LOWER_THRESHOLDS)
+        or any(t - RSI_TRIGGER_BAND < rsi <= t for t in RSI_UPPER_THRESHOLDS)
+    )
+
+
+def _price_near_trigger(close, s1, r1, ema200):
+    """Close just above the S1 trigger, just below the R1 trigger, or at EMA200"""
+    if not close:
+        return False
+    band = PRICE_TRIGGER_BAND_PCT / 100
+    if s1 and s1 * 1.02 < close <= s1 * 1.02 * (1 + band):
+        return True
+    if r1 and r1 * 0.98 * (1 - band) <= close < r1 * 0.98:
+        return True
+    return bool(_near(close, ema200, PRICE_TRIGGER_BAND_PCT))
+
+
+def entry_key(symbol, exchange, screener, tf):
+    """Key shared by refresh plan, previous rows and history snapshot"""
+    return (
+        str(symbol).split(":")[-1].strip().upper(),
+        str(exchange).strip().upper(),
+        str(screener).strip().lower(),
+        str(tf).strip().upper(),
+    )
+
+
+def row_key(row):
+    """entry_key of a data row"""
+    return entry_key(row[0], row[COL_EXCHANGE], row[COL_SCREENER], row[2])
+
+
+def load_previous_rows(all_rows, header, exchange_lookup=None):
+    """
+    Index last written data tab rows by entry_key
+    Columns are matched by the tab's own header row, so tabs written with an
+    older layout are mapped onto `header`. Rows without Exchange/Screener
+    (older layout) take them from exchange_lookup {symbol: (exchange, screener)}
+    when the symbol is unambiguous, otherwise they are skipped.
+    Numeric columns are coerced so rows can be carried into dashboards unchanged
+    """
+    previous = {}
+    if not all_rows:
+        return previous
+
+    index = {str(name): i for i, name in enumerate(all_rows[0])}
+    for raw in all_rows[1:]:
+        row = [raw[index[name]] if name in index and index[name] < len(raw) else "" for name in header]
+        symbol, tf = str(row[0]), str(row[2])
+        if not symbol or tf in ("", "ERROR"):
+            continue
+        if not row[COL_EXCHANGE]:
+            if not exchange_lookup or symbol not in exchange_lookup:
+                continue
+            row[COL_EXCHANGE], row[COL_SCREENER] = exchange_lookup[symbol]
+        for i in (3, 4, 5):
+            row[i] = _num(row[i]) or 0
+        row[10] = int(_num(row[10]) or 0)
+        previous[row_key(row)] = row
+    return previous
+
+
+def merge_previous(previous_list):
+    """Merge several previous-row maps, keeping the most recently updated row per key"""
+    merged = {}
+    for previous in previous_list:
+        for key, row in previous.items():
+            if key not in merged or str(row[COL_UPDATED]) > str(merged[key][COL_UPDATED]):
+                merged[key] = row
+    return merged
+
+
+def mark_stale(row, name):
+    """Carry a previous row forward with a staleness marker"""
+    row = list(row)
+    row[1] = name
+    row[COL_STATUS] = STATUS_STALE
+    return row
+
+
+def assign_tier(tf, row):
+    """Tier from timeframe, promoted one step per hot factor (never-seen = tier 1)"""
+    if row is None:
+        return 1
+
+    close = _num(row[3])
+    rsi = _num(row[4])
+    confidence = _num(row[10]) or 0
+    ema20, ema200, s1, r1 = (_num(row[i]) for i in (11, 12, 14, 15))
+
+    near_trigger = _rsi_near_trigger(rsi) or _price_near_trigger(close, s1, r1, ema200)
+    volatile = bool(close and ema20 and abs(close - ema20) / abs(ema20) * 100 > VOLATILITY_PCT)
+    hot_factors = sum([near_trigger, volatile, confidence >= HOT_CONFIDENCE])
+
+    return max(1, TIMEFRAME_BASE_TIER.get(tf, 2) - hot_factors)
+
+
+def age_hours(row, now):
+    """Hours since the row was last refreshed (None if never)"""
+    if row is None:
+        return None
+    try:
+        updated = datetime.strptime(str(row[COL_UPDATED]), TS_FORMAT)
+    except ValueError:
+        return None
+    return (now - updated).total_seconds() / 3600
+
+
+def plan_refresh(keys, previous, now, budget=REFRESH_REQUEST_BUDGET):
+    """
+    Pick which entries to fetch this run
+    keys: entry_key of every configured symbol/timeframe
+    previous: {entry_key: last row} from load_previous_rows
+    now: naive datetime in the same timezone as the Updated column
+    Returns: set of keys to refresh
+    """
+    due = []
+    tier_counts = {}
+    for key in keys:
+        row = previous.get(key)
+        tier = assign_tier(key[3], row)
+        tier_counts[tier] = tier_counts.get(tier, 0) + 1
+        age = age_hours(row, now)
+        max_age = REFRESH_TIER_MAX_AGE_HOURS.get(tier, 24)
+        if age is None or age >= max_age:
+            # Never-refreshed entries first, then the most overdue relative to
+            # their tier's max age (hotter tier breaks ties)
+            overdue = age / max_age if age is not None and max_age else 0
+            due.append((age is not None, -overdue, tier, key))
+
+    due.sort()
+    selected = {key for *_, key in due[:budget]}
+
+    print(f"📋 Refresh plan: {len(keys)} entries, tiers {dict(sorted(tier_counts.items()))}")
+    print(f"   - Due: {len(due)}, refreshing {len(selected)} (budget {budget})")
+    return selected
@@ -1,18 +1,30 @@
 # run_update.py
 import os
+import traceback
 from datetime import datetime, timezone, timedelta
 from config import (
     CRYPTO_TIMEFRAMES, STOCK_TIMEFRAMES,
     TAB_CONFIG, TAB_CRYPTO, TAB_STOCK_TW, TAB_STOCK_VN, TAB_HISTORY,
+    TAB_HISTORY_STATE, TAB_TRANSITIONS, TAB_UNRESOLVED, TAB_SYMBOL_CACHE, TS_FORMAT,
     TAB_DASHBOARD_STOCK_TW, TAB_DASHBOARD_STOCK_VN, TAB_DASHBOARD_CRYPTO,
-    load_config_from_sheet, ensure_config_tab
+    load_config_from_rows
 )
-from tv_fetch import fetch_multi_timeframes
+from tv_fetch import fetch_multi_timeframes, SymbolNotFoundError
+from history_log import (
+    TRANSITIONS_HEADER, load_snapshot, select_changes, snapshot_table
+)
+from refresh_priority import (
+    COL_STATUS, STATUS_LIVE, STATUS_STALE, STATUS_ERROR, entry_key,
+    load_previous_rows, merge_previous, mark_stale, plan_refresh
+)
+from symbol_cache import SymbolCache, cache_key
 from sheets_writer import (
     open_spreadsheet, ensure_tab, write_table, 
     append_rows, update_dashboard_crypto, 
     update_dashboard_stock_tw, update_dashboard_stock_vn,
-    delete_tab_if_exists
+    delete_tab_if_exists, flush_writes, scheduler,
+    get_model, commit_tabs, read_tables, add_missing_tabs, discard_spreadsheet,
+    read_config_rows
 )
 
 def normalize_value(value):
@@ -93,39 +105,60 @@ def get_buffett_signal(close, ema20, ema200, rsi, macd, signal, adx, volume, vol
     }
 
 
-def process_symbols(symbols, timeframes, asset_type):
-    """Process symbols and return data rows"""
+def symbol_key(sym):
+    """Clean symbol as written to data tabs (drops EXCHANGE: prefix)"""
+    return normalize_value(sym.split(":")[-1])
+
+
+def process_symbols(symbols, timeframes, asset_type, ts, plan=None, previous=None, cache=None):
+    """
+    Process symbols and return data rows
+    plan: set of entry_key to fetch (None = fetch everything)
+    previous: {entry_key: row} carried forward as STALE when not fetched
+    cache: SymbolCache; known-bad symbols are skipped until their re-check time
+    """
     rows = []
+    previous = previous or {}
+    now = datetime.strptime(ts, TS_FORMAT)
 
     for item in symbols:
         sym = item[0]
         name = item[1]
         exchange = item[2]
         screener = item[3]
+        clean_symbol = symbol_key(sym)
 
-        try:
-            print(f"🔄 Fetching {asset_type}: {sym} ({exchange}/{screener})...")
-
-            data = fetch_multi_timeframes(sym, exchange, screener, timeframes)
+        if cache is not None and not cache.should_try(sym, exchange, screener, now):
+            print(f"ℹ️ Skipping {sym} ({exchange}/{screener}) - unresolved, see '{TAB_UNRESOLVED}' tab")
+            continue
 
-            if not data:
+        try:
+            fetch_tfs = [tf for tf in timeframes if plan is None or entry_key(sym, exchange, screener, tf) in plan]
+            data = {}
+            if fetch_tfs:
+                print(f"🔄 Fetching {asset_type}: {sym} ({exchange}/{screener}) {fetch_tfs}...")
+                data = fetch_multi_timeframes(sym, exchange, screener, fetch_tfs)
+                if cache is not None and any(data.values()):
+                    cache.mark_ok(sym, exchange, screener, now)
+
+            if fetch_tfs and not data:
                 print(f"❌ No data returned for {sym}")
                 rows.append([
                     normalize_value(sym), name, "ERROR", 0, 0, 0,
-                    "N/A", "N/A", "N/A", "NO DATA", 0, 0, 0, 0, 0, 0
+                    "N/A", "N/A", "N/A", "NO DATA", 0, 0, 0, 0, 0, 0, ts, STATUS_ERROR, exchange, screener
                 ])
                 continue
 
             for tf in timeframes:
-                if tf not in data or not data[tf]:
-                    print(f"⚠️ Skipping {sym} {tf} - no data")
-                    continue
-
-                d = data[tf]
+                d = data.get(tf) or {}
                 c = d.get("close")
 
                 if not c:
-                    print(f"⚠️ Skipping {sym} {tf} - no close price")
+                    prev = previous.get(entry_key(sym, exchange, screener, tf))
+                    if prev is not None:
+                        rows.append(mark_stale(prev, name))
+                    elif tf in fetch_tfs:
+                        print(f"⚠️ Skipping {sym} {tf} - no data")
                     continue
 
                 e20 = d.get("EMA20")
@@ -144,7 +177,6 @@ def process_symbols(symbols, timeframes, asset_type):
 
                 result = get_buffett_signal(c, e20, e200, rsi, macd, sig, adx, vol, vol_ma, bb_u, bb_l, pivot, s1, r1)
 
-                clean_symbol = normalize_value(sym.split(":")[-1])
                 timeframe = normalize_value(tf)
 
                 row = [
@@ -159,11 +191,22 @@ def process_symbols(symbols, timeframes, asset_type):
                     normalize_value(result["trend_quality"]),
                     result["signal"],
                     result["confidence"],
-                    e20, e200, pivot, s1, r1
+                    e20, e200, pivot, s1, r1,
+                    ts, STATUS_LIVE, exchange, screener
                 ]
                 rows.append(row)
 
-            print(f"✅ {asset_type}: {clean_symbol} - {len([tf for tf in timeframes if tf in data and data[tf]])} timeframes OK")
+            if fetch_tfs:
+                print(f"✅ {asset_type}: {clean_symbol} - {len([tf for tf in fetch_tfs if data.get(tf)])} timeframes OK")
+
+        except SymbolNotFoundError as e:
+            print(f"❌ {asset_type} {sym}: {e}")
+            if cache is not None:
+                cache.mark_bad(sym, exchange, screener, e, now)
+            rows.append([
+                normalize_value(sym), name, "ERROR", 0, 0, 0,
+                "N/A", "N/A", "N/A", "NOT FOUND", 0, 0, 0, 0, 0, 0, ts, STATUS_ERROR, exchange, screener
+            ])
 
         except Exception as e:
             print(f"❌ Critical error {asset_type} {sym}: {e}")
@@ -171,65 +214,76 @@ def process_symbols(symbols, timeframes, asset_type):
             traceback.print_exc()
             rows.append([
                 normalize_value(sym), name, "ERROR", 0, 0, 0,
-                "N/A", "N/A", "N/A", f"ERROR: {str(e)[:30]}", 0, 0, 0, 0, 0, 0
+                "N/A", "N/A", "N/A", f"ERROR: {str(e)[:30]}", 0, 0, 0, 0, 0, 0, ts, STATUS_ERROR, exchange, screener
             ])
 
     return rows
 
 
+# Desired tab sequence:
+# config => history => transitions => Crypto => Stock_TW => Stock_VN
+# => Dashboard_Crypto => Dashboard_Stock_TW => Dashboard_Stock_VN => unresolved
+# => history_state => symbol_cache
+TAB_ORDER = [
+    TAB_CONFIG,
+    TAB_HISTORY,
+    TAB_TRANSITIONS,
+    TAB_CRYPTO,
+    TAB_STOCK_TW,
+    TAB_STOCK_VN,
+    TAB_DASHBOARD_CRYPTO,
+    TAB_DASHBOARD_STOCK_TW,
+    TAB_DASHBOARD_STOCK_VN,
+    TAB_UNRESOLVED,
+    TAB_HISTORY_STATE,
+    TAB_SYMBOL_CACHE
+]
+
+
 def reorder_tabs(ss):
+    """Reorder tabs to TAB_ORDER in the local model (sent on next commit)"""
+    print("\n📑 Reordering tabs...")
+    model = get_model(ss)
+
+    index = 0
+    for tab_name in TAB_ORDER:
+        if not model.has(tab_name):
+            continue
+        if model.move(tab_name, index):
+            print(f"   ✅ {tab_name} → position {index + 1}")
+        index += 1
+
+
+# Header for all data tabs
+HEADER = [
+    "Symbol", "Name", "TF",
+    "Price", "RSI", "ADX", "Vol.Strength",
+    "Trend", "Quality", "Buffett Signal", "Confidence%",
+    "EMA20", "EMA200", "Pivot", "S1", "R1",
+    "Updated(TW)", "Status", "Exchange", "Screener"
+]
+
+
+def get_sheet_ids():
+    """SHEET_IDS (comma separated) for fan-out mode, else the single SHEET_ID"""
+    raw = os.environ.get("SHEET_IDS") or os.environ.get("SHEET_ID") or ""
+    # Deduplicate (keeping order) so a repeated id isn't written twice per run
+    sheet_ids = list(dict.fromkeys(s.strip() for s in raw.split(",") if s.strip()))
+    if not sheet_ids:
+        raise RuntimeError("Missing SHEET_ID (or SHEET_IDS) environment variable")
+    return sheet_ids
+
+
+def prepare_target(ss):
     """
-    Reorder tabs in the desired sequence:
-    config => history => Crypto => Stock_TW => Stock_VN => Dashboard_Crypto => Dashboard_Stock_TW => Dashboard_Stock_VN
+    Prepare one spreadsheet: config, tab layout and last run state
+    Returns a dict with its config entries and state
     """
-    desired_order = [
-        TAB_CONFIG,
-        TAB_HISTORY,
-        TAB_CRYPTO,
-        TAB_STOCK_TW,
-        TAB_STOCK_VN,
-        TAB_DASHBOARD_CRYPTO,
-        TAB_DASHBOARD_STOCK_TW,
-        TAB_DASHBOARD_STOCK_VN
-    ]
-
-    print("\n📑 Reordering tabs...")
-    worksheets = ss.worksheets()
-
-    # Create a mapping of tab names to worksheet objects
-    ws_map = {ws.title: ws for ws in worksheets}
-
-    # Reorder tabs
-    for index, tab_name in enumerate(desired_order):
-        if tab_name in ws_map:
-            try:
-                ws_map[tab_name].update_index(index)
-                print(f"   ✅ {tab_name} → position {index + 1}")
-            except Exception as e:
-                print(f"   ⚠️ Could not reorder {tab_name}: {e}")
-
-
-def main():
-    sheet_id = os.environ.get("SHEET_ID")
-    if not sheet_id:
-        raise RuntimeError("Missing SHEET_ID environment variable")
-
-    now_tw = datetime.now(timezone.utc) + timedelta(hours=8)
-    ts = now_tw.strftime("%Y-%m-%d %H:%M")
-
-    sa_path = "service_account.json"
-
-    print("🔐 Connecting to Google Sheets...")
-    ss = open_spreadsheet(sa_path, sheet_id)
-
-    # === STEP 1: ENSURE CONFIG TAB EXISTS ===
-    ensure_config_tab(ss)
+    # === STEP 1: ENSURE CONFIG TAB EXISTS (tab model is loaded once here) ===
+    config_rows = read_config_rows(ss)
 
     # === STEP 2: LOAD CONFIG FROM GOOGLE SHEET ===
-    load_config_from_sheet(ss)
-
-    # Import after loading
-    from config import CRYPTO_COINS, STOCK_COINS_TW, STOCK_COINS_VN, FOREX_METALS
+    crypto, stock_tw, stock_vn, forex = load_config_from_rows(config_rows)
 
     # === STEP 3: DELETE OLD TABS ===
     print("\n🗑️ Removing old tabs...")
@@ -238,67 +292,123 @@ def main():
     delete_tab_if_exists(ss, "Stock")  # Old combined stock tab
     delete_tab_if_exists(ss, "Dashboard_Stock")  # Old combined dashboard
 
-    # Header for all tabs
-    header = [
-        "Symbol", "Name", "TF",
-        "Price", "RSI", "ADX", "Vol.Strength",
-        "Trend", "Quality", "Buffett Signal", "Confidence%",
-        "EMA20", "EMA200", "Pivot", "S1", "R1"
-    ]
+    # === STEP 4: ENSURE + REORDER TABS (one batch_update) ===
+    add_missing_tabs(ss, TAB_ORDER)
+    reorder_tabs(ss)
+    commit_tabs(ss)
+
+    # === STEP 5: LOAD LAST RUN STATE (one batch read) ===
+    tables = read_tables(ss, [TAB_CRYPTO, TAB_STOCK_TW, TAB_STOCK_VN, TAB_HISTORY_STATE, TAB_SYMBOL_CACHE])
+    # Rows written before Exchange/Screener existed are matched by symbol
+    # when it appears only once in this sheet's config
+    items = crypto + forex + stock_tw + stock_vn
+    symbols = [symbol_key(item[0]) for item in items]
+    exchange_lookup = {
+        symbol_key(item[0]): (item[2], item[3]) for item in items
+        if symbols.count(symbol_key(item[0])) == 1
+    }
+    previous = {}
+    for tab_name in [TAB_CRYPTO, TAB_STOCK_TW, TAB_STOCK_VN]:
+        previous.update(load_previous_rows(tables.get(tab_name, []), HEADER, exchange_lookup))
 
-    # === PROCESS DATA (but don't write yet) ===
+    return {
+        "ss": ss,
+        "crypto": crypto + forex,
+        "stock_tw": stock_tw,
+        "stock_vn": stock_vn,
+        "previous": previous,
+        "snapshot": load_snapshot(tables.get(TAB_HISTORY_STATE, [])),
+        "cache": SymbolCache(tables.get(TAB_SYMBOL_CACHE, [])),
+    }
 
-    # Crypto
-    print(f"\n🚀 Processing Crypto & Forex/Metals...")
-    all_crypto_assets = CRYPTO_COINS + FOREX_METALS
-    print(f"   - Crypto: {len(CRYPTO_COINS)} symbols")
-    print(f"   - Forex/Metals: {len(FOREX_METALS)} symbols")
-    crypto_rows = process_symbols(all_crypto_assets, CRYPTO_TIMEFRAMES, "CRYPTO/FOREX")
 
-    # Taiwan stocks
-    print(f"\n🇹🇼 Processing {len(STOCK_COINS_TW)} Taiwan stocks...")
-    stock_tw_rows = process_symbols(STOCK_COINS_TW, STOCK_TIMEFRAMES, "STOCK_TW")
+def unique_items(item_lists):
+    """Union of config entries, deduplicated by (symbol, exchange, screener)"""
+    unique = {}
+    for items in item_lists:
+        for item in items:
+            unique.setdefault(cache_key(item[0], item[2], item[3]), item)
+    return list(unique.values())
 
-    # Vietnam stocks
-    print(f"\n🇻🇳 Processing {len(STOCK_COINS_VN)} Vietnam stocks...")
-    stock_vn_rows = process_symbols(STOCK_COINS_VN, STOCK_TIMEFRAMES, "STOCK_VN")
+
+def process_universe(items, timeframes, asset_type, ts, plan, previous, cache):
+    """Fetch and evaluate each unique entry once -> {(symbol, exchange, screener): rows}"""
+    return {
+        cache_key(item[0], item[2], item[3]): process_symbols([item], timeframes, asset_type, ts, plan, previous, cache)
+        for item in items
+    }
+
+
+def select_rows(rows_by_item, items):
+    """Rows for one spreadsheet's config entries, in its own order and with its own names"""
+    rows = []
+    for sym, name, exchange, screener in items:
+        for row in rows_by_item.get(cache_key(sym, exchange, screener), []):
+            row = list(row)
+            row[1] = name
+            rows.append(row)
+    return rows
+
+
+def write_target(target, crypto_rows, stock_tw_rows, stock_vn_rows, cache, ts):
+    """
+    Queue history appends and all tab writes for one spreadsheet
+    Appends are sent after the tables (incl. history_state) are written, so
+    a snapshot that fails to save can't cause duplicate history next run
+    """
+    ss = target["ss"]
+    snapshot = target["snapshot"]
 
     # === WRITE DATA IN ORDER ===
 
     # 1. Config tab (already exists)
 
-    # 2. History tab
-    history_header = ["Time(TW)", "Asset Type"] + header
+    # 2. History tab (change-only: compare against last emitted state)
+    history_header = ["Time(TW)", "Asset Type"] + HEADER
     history_rows = []
+    transition_rows = []
 
-    for row in crypto_rows:
-        if row[2] != "ERROR":
-            history_rows.append([ts, "CRYPTO"] + row)
-    for row in stock_tw_rows:
-        if row[2] != "ERROR":
-            history_rows.append([ts, "STOCK_TW"] + row)
-    for row in stock_vn_rows:
-        if row[2] != "ERROR":
-            history_rows.append([ts, "STOCK_VN"] + row)
+    for rows, asset_type in [(crypto_rows, "CRYPTO"), (stock_tw_rows, "STOCK_TW"), (stock_vn_rows, "STOCK_VN")]:
+        live_rows = [r for r in rows if r[COL_STATUS] == STATUS_LIVE]
+        changed, transitions = select_changes(live_rows, asset_type, snapshot, ts)
+        history_rows.extend(changed)
+        transition_rows.extend(transitions)
 
     ws_history = ensure_tab(ss, TAB_HISTORY)
-    if len(ws_history.get_all_values()) == 0:
-        ws_history.update("A1", [history_header])
+    if scheduler.read(ws_history.row_values, 1) != history_header:
+        scheduler.write(ws_history.update, range_name="A1", values=[history_header])
     if history_rows:
         append_rows(ws_history, history_rows)
+    else:
+        print("ℹ️ No changes since last run, history unchanged")
+
+    ws_transitions = ensure_tab(ss, TAB_TRANSITIONS)
+    if scheduler.read(ws_transitions.row_values, 1) != TRANSITIONS_HEADER:
+        scheduler.write(ws_transitions.update, range_name="A1", values=[TRANSITIONS_HEADER])
+    if transition_rows:
+        append_rows(ws_transitions, transition_rows)
+
+    ws_state = ensure_tab(ss, TAB_HISTORY_STATE)
+    write_table(ws_state, snapshot_table(snapshot))
+
+    # Symbol resolution cache + report of unresolved config rows
+    config_entries = target["crypto"] + target["stock_tw"] + target["stock_vn"]
+    unresolved_data = cache.unresolved_report(config_entries)
+    write_table(ensure_tab(ss, TAB_SYMBOL_CACHE), cache.table(config_entries))
+    write_table(ensure_tab(ss, TAB_UNRESOLVED), unresolved_data)
 
     # 3. Crypto tab
-    crypto_data = [header] + crypto_rows
+    crypto_data = [HEADER] + crypto_rows
     ws_crypto = ensure_tab(ss, TAB_CRYPTO)
     write_table(ws_crypto, crypto_data)
 
     # 4. Stock_TW tab
-    stock_tw_data = [header] + stock_tw_rows
+    stock_tw_data = [HEADER] + stock_tw_rows
     ws_stock_tw = ensure_tab(ss, TAB_STOCK_TW)
     write_table(ws_stock_tw, stock_tw_data)
 
     # 5. Stock_VN tab
-    stock_vn_data = [header] + stock_vn_rows
+    stock_vn_data = [HEADER] + stock_vn_rows
     ws_stock_vn = ensure_tab(ss, TAB_STOCK_VN)
     write_table(ws_stock_vn, stock_vn_data)
 
@@ -308,15 +418,103 @@ def main():
     update_dashboard_stock_tw(ss, stock_tw_data)
     update_dashboard_stock_vn(ss, stock_vn_data)
 
-    # === REORDER ALL TABS ===
-    reorder_tabs(ss)
-
-    print(f"\n✅ Done! Updated:")
+    print(f"\n✅ Queued '{ss.title}':")
     print(f"   - Crypto: {len([r for r in crypto_rows if r[2] != 'ERROR'])} signals")
     print(f"   - Stock TW: {len([r for r in stock_tw_rows if r[2] != 'ERROR'])} signals")
     print(f"   - Stock VN: {len([r for r in stock_vn_rows if r[2] != 'ERROR'])} signals")
+    print(f"   - Stale (carried): {len([r for r in crypto_rows + stock_tw_rows + stock_vn_rows if r[COL_STATUS] == STATUS_STALE])} rows")
     print(f"   - History: {len(history_rows)} records")
-    print(f"\n📑 Tab order: config → history → Crypto → Stock_TW → Stock_VN → Dashboard_Crypto → Dashboard_Stock_TW → Dashboard_Stock_VN")
+    print(f"   - Transitions: {len(transition_rows)} signal flips")
+    print(f"   - Unresolved: {len([r for r in unresolved_data[1:] if len(r) > 1])} config rows")
+
+
+def main():
+    sheet_ids = get_sheet_ids()
+
+    now_tw = datetime.now(timezone.utc) + timedelta(hours=8)
+    ts = now_tw.strftime(TS_FORMAT)
+
+    sa_path = "service_account.json"
+
+    # === PREPARE EVERY TARGET SPREADSHEET ===
+    # A failing target is logged and left out; the others still update
+    targets = []
+    failed = []
+    for sheet_id in sheet_ids:
+        print(f"\n🔐 Connecting to Google Sheet {sheet_id}...")
+        ss = None
+        try:
+            ss = open_spreadsheet(sa_path, sheet_id)
+            targets.append(prepare_target(ss))
+        except Exception as e:
+            print(f"❌ Skipping spreadsheet {sheet_id}: {e}")
+            traceback.print_exc()
+            if ss is not None:
+                discard_spreadsheet(ss)
+            failed.append(sheet_id)
+
+    if not targets:
+        raise RuntimeError(f"No spreadsheet could be prepared: {', '.join(failed)}")
+
+    # === UNION OF ALL TARGETS (each entry fetched once) ===
+    previous = merge_previous([t["previous"] for t in targets])
+    cache = SymbolCache([])
+    for t in targets:
+        cache.merge(t["cache"])
+
+    all_crypto_assets = unique_items(t["crypto"] for t in targets)
+    all_stock_tw = unique_items(t["stock_tw"] for t in targets)
+    all_stock_vn = unique_items(t["stock_vn"] for t in targets)
+
+    # === PLAN REFRESH (highest-priority stale entries first) ===
+    # Known-bad symbols waiting for their re-check don't consume budget
+    now = now_tw.replace(tzinfo=None)
+    keys = [entry_key(item[0], item[2], item[3], tf) for item in all_crypto_assets
+            if cache.should_try(item[0], item[2], item[3], now) for tf in CRYPTO_TIMEFRAMES]
+    keys += [entry_key(item[0], item[2], item[3], tf) for item in all_stock_tw + all_stock_vn
+             if cache.should_try(item[0], item[2], item[3], now) for tf in STOCK_TIMEFRAMES]
+    plan = plan_refresh(keys, previous, now)
+
+    # === PROCESS DATA (but don't write yet) ===
+
+    # Crypto
+    print(f"\n🚀 Processing {len(all_crypto_assets)} unique Crypto & Forex/Metals...")
+    crypto_by_item = process_universe(all_crypto_assets, CRYPTO_TIMEFRAMES, "CRYPTO/FOREX", ts, plan, previous, cache)
+
+    # Taiwan stocks
+    print(f"\n🇹🇼 Processing {len(all_stock_tw)} unique Taiwan stocks...")
+    stock_tw_by_item = process_universe(all_stock_tw, STOCK_TIMEFRAMES, "STOCK_TW", ts, plan, previous, cache)
+
+    # Vietnam stocks
+    print(f"\n🇻🇳 Processing {len(all_stock_vn)} unique Vietnam stocks...")
+    stock_vn_by_item = process_universe(all_stock_vn, STOCK_TIMEFRAMES, "STOCK_VN", ts, plan, previous, cache)
+
+    # === WRITE EACH TARGET'S SUBSET ===
+    for t in targets:
+        print(f"\n📝 Writing '{t['ss'].title}'...")
+        try:
+            write_target(
+                t,
+                select_rows(crypto_by_item, t["crypto"]),
+                select_rows(stock_tw_by_item, t["stock_tw"]),
+                select_rows(stock_vn_by_item, t["stock_vn"]),
+                cache, ts,
+            )
+        except Exception as e:
+            print(f"❌ Writing '{t['ss'].title}' failed: {e}")
+            traceback.print_exc()
+            discard_spreadsheet(t["ss"])
+            failed.append(t["ss"].id)
+
+    # Send queued writes: data tabs first, then dashboards
+    print("\n📤 Flushing queued writes...")
+    failed.extend(sorted(flush_writes()))
+
+    print(f"\n✅ Done! Refreshed {len(plan)} entries for {len(all_crypto_assets) + len(all_stock_tw) + len(all_stock_vn)} unique symbols across {len(targets)} spreadsheet(s)")
+    print(f"\n📑 Tab order: config → history → transitions → Crypto → Stock_TW → Stock_VN → Dashboard_Crypto → Dashboard_Stock_TW → Dashboard_Stock_VN → unresolved → history_state → symbol_cache")
+
+    if failed:
+        raise RuntimeError(f"Failed spreadsheet(s): {', '.join(failed)}")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,28 @@
 # sheets_writer.py
+import random
+import time
+from collections import deque
+
 import gspread
+from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from google.oauth2.service_account import Credentials
 
+from config import (
+    SHEETS_READ_QUOTA_PER_MIN, SHEETS_WRITE_QUOTA_PER_MIN, SHEETS_MAX_RETRIES,
+    TAB_CONFIG, CONFIG_EXAMPLE,
+)
+
+# Write priorities: lower values are flushed first, so data tabs always land
+# before the dashboards that are built from them.
+PRIORITY_DATA = 0
+PRIORITY_DASHBOARD = 1
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# A 429 is rejected before anything is applied, so it is the only status
+# that is safe to retry for calls that are not idempotent (appends, tab adds)
+RETRYABLE_STATUS_NON_IDEMPOTENT = {429}
+
 def open_spreadsheet(sa_json_path: str, sheet_id: str):
     """Connect to Google Sheets using modern google-auth"""
     scopes = [
@@ -14,39 +35,396 @@ def open_spreadsheet(sa_json_path: str, sheet_id: str):
     return client.open_by_key(sheet_id)
 
 
-def ensure_tab(ss, tab_name: str):
-    """Get or create worksheet"""
+class SlidingWindowLimiter:
+    """
+    Allows at most `per_minute` calls in any 60-second window
+    Unlike a token bucket that starts full, this can never exceed the
+    quota, not even in the first minute of a run.
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, per_minute: int, clock=time.monotonic, sleep=time.sleep):
+        self.per_minute = per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self.calls = deque()  # monotonic timestamps of calls in the window
+
+    def _expire(self, now):
+        while self.calls and now - self.calls[0] >= self.WINDOW:
+            self.calls.popleft()
+
+    def available(self) -> int:
+        self._expire(self.clock())
+        return self.per_minute - len(self.calls)
+
+    def take(self):
+        """Block until a call fits in the window, then record it"""
+        now = self.clock()
+        self._expire(now)
+        if len(self.calls) >= self.per_minute:
+            wait = self.WINDOW - (now - self.calls[0])
+            print(f"⏳ Sheets quota low, waiting {wait:.1f}s...")
+            self.sleep(wait)
+            now = self.clock()
+            self._expire(now)
+        self.calls.append(now)
+
+
+class RequestScheduler:
+    """
+    Quota-aware gate for all Google Sheets calls
+    - Reads and writes are limited by separate 60-second sliding windows
+    - 429/5xx responses are retried with exponential backoff + jitter
+      (429 only for non-idempotent calls, see write_once)
+    - Table writes are queued and merged into one batch update + one batch
+      clear per spreadsheet and priority, flushed data tabs first
+    - Row appends are queued too and sent only after all of a spreadsheet's
+      table writes succeeded
+    """
+
+    def __init__(self, read_per_min=SHEETS_READ_QUOTA_PER_MIN,
+                 write_per_min=SHEETS_WRITE_QUOTA_PER_MIN,
+                 max_retries=SHEETS_MAX_RETRIES, base_delay=1.0, max_delay=64.0):
+        self.read_limiter = SlidingWindowLimiter(read_per_min)
+        self.write_limiter = SlidingWindowLimiter(write_per_min)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.pending = {}  # (priority, spreadsheet id) -> {tab title: (ws, data)}
+        self.appends = {}  # spreadsheet id -> [(ws, rows), ...]
+
+    def read(self, fn, *args, **kwargs):
+        return self._execute(self.read_limiter, RETRYABLE_STATUS, fn, args, kwargs)
+
+    def write(self, fn, *args, **kwargs):
+        return self._execute(self.write_limiter, RETRYABLE_STATUS, fn, args, kwargs)
+
+    def write_once(self, fn, *args, **kwargs):
+        """Write that must not be repeated after a 5xx (it may have been applied)"""
+        return self._execute(self.write_limiter, RETRYABLE_STATUS_NON_IDEMPOTENT, fn, args, kwargs)
+
+    def _execute(self, limiter, retryable, fn, args, kwargs):
+        attempt = 0
+        while True:
+            limiter.take()
+            try:
+                return fn(*args, **kwargs)
+            except APIError as e:
+                status = getattr(e.response, "status_code", None)
+                if status not in retryable or attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) + random.uniform(0, 1)
+                attempt += 1
+                print(f"⚠️ Sheets API {status}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def queue_table(self, ws, data, priority=PRIORITY_DATA):
+        """Queue a full-table rewrite; a later write to the same tab replaces the earlier one"""
+        key = (priority, ws.spreadsheet.id)
+        self.pending.setdefault(key, {})[ws.title] = (ws, data)
+
+    def queue_append(self, ws, rows):
+        """Queue rows to append once the spreadsheet's table writes have landed"""
+        self.appends.setdefault(ws.spreadsheet.id, []).append((ws, rows))
+
+    def discard(self, ss):
+        """Drop all queued writes for a spreadsheet"""
+        self.pending = {key: tables for key, tables in self.pending.items() if key[1] != ss.id}
+        self.appends.pop(ss.id, None)
+
+    def flush(self, failed=None):
+        """
+        Send all queued table writes, lowest priority value first, then appends
+        New values are written before anything is cleared, so a failed
+        update leaves the previous contents in place. A spreadsheet that
+        fails is skipped for the remaining priorities and its appends are
+        not sent; others continue.
+        Returns: set of spreadsheet ids that failed
+        """
+        failed = set(failed or ())
+        for key in sorted(self.pending):
+            if key[1] in failed:
+                print(f"⚠️ Skipping queued writes for spreadsheet {key[1]} (earlier failure)")
+                continue
+            try:
+                self._flush_tables(self.pending[key])
+            except Exception as e:
+                print(f"❌ Writing to spreadsheet {key[1]} failed: {e}")
+                failed.add(key[1])
+        self.pending = {}
+
+        for ss_id, appends in self.appends.items():
+            if ss_id in failed:
+                print(f"⚠️ Skipping queued appends for spreadsheet {ss_id} (earlier failure)")
+                continue
+            try:
+                for ws, rows in appends:
+                    self.write_once(ws.append_rows, rows, value_input_option="USER_ENTERED")
+                    print(f"✅ Appended {len(rows)} rows to '{ws.title}'")
+            except Exception as e:
+                print(f"❌ Appending to spreadsheet {ss_id} failed: {e}")
+                failed.add(ss_id)
+        self.appends = {}
+        return failed
+
+    def _flush_tables(self, tables):
+        """Write one spreadsheet's queued tables for one priority"""
+        ss = next(iter(tables.values()))[0].spreadsheet
+        model = get_model(ss)
+
+        data_ranges = []
+        clear_ranges = []
+        for title, (ws, data) in tables.items():
+            # Pad rows to a rectangle so short rows overwrite old cells too;
+            # None becomes "" because a null in the request leaves the old cell
+            width = max((len(r) for r in data), default=0)
+            values = [["" if v is None else v for v in r] + [""] * (width - len(r)) for r in data]
+            data_ranges.append({"range": absolute_range_name(title, "A1"), "values": values})
+
+            # Clear only what lies outside the new data
+            grid_rows, grid_cols = model.grid[title]
+            if len(data) < grid_rows:
+                clear_ranges.append(absolute_range_name(title, f"{len(data) + 1}:{grid_rows}"))
+            if data and width < grid_cols:
+                clear_ranges.append(absolute_range_name(
+                    title, f"{rowcol_to_a1(1, width + 1)}:{rowcol_to_a1(len(data), grid_cols)}"
+                ))
+
+        self.write(ss.values_batch_update, {"valueInputOption": "RAW", "data": data_ranges})
+        if clear_ranges:
+            self.write(ss.values_batch_clear, body={"ranges": clear_ranges})
+        for title, (ws, data) in tables.items():
+            print(f"✅ Written {len(data)} rows to '{title}'")
+
+
+scheduler = RequestScheduler()
+
+
+def _worksheet_from_properties(ss, properties):
+    """Build a Worksheet from API properties (gspread 6.x and 5.x signatures)"""
     try:
-        ws = ss.worksheet(tab_name)
+        return gspread.Worksheet(ss, properties, ss.id, ss.client)
+    except TypeError:
+        return gspread.Worksheet(ss, properties)
+
+
+class SpreadsheetModel:
+    """
+    Local copy of worksheet properties, loaded with a single metadata read
+    Adds, deletes, index moves and resizes are recorded locally and sent
+    together as one batch_update by commit()
+    """
+
+    def __init__(self, ss):
+        self.ss = ss
+        worksheets = sorted(scheduler.read(ss.worksheets), key=lambda ws: ws.index)
+        self.order = [ws.title for ws in worksheets]
+        self.worksheets = {ws.title: ws for ws in worksheets}
+        self.ids = {ws.title: ws.id for ws in worksheets}
+        self.grid = {ws.title: [ws.row_count, ws.col_count] for ws in worksheets}
+        self.next_id = max(list(self.ids.values()) + [0]) + 1
+        self.added = []
+        self.deleted = []
+        self.moves = []
+        self.resized = set()
+
+    def has(self, title):
+        """True if the tab exists or is pending creation"""
+        return title in self.ids
+
+    def get(self, title):
+        """Return Worksheet for title, or None if it doesn't exist (yet)"""
+        return self.worksheets.get(title)
+
+    def add(self, title, rows=500, cols=20):
+        """Record a new tab; its Worksheet is available after commit()"""
+        self.ids[title] = self.next_id
+        self.grid[title] = [rows, cols]
+        self.next_id += 1
+        self.order.append(title)
+        self.added.append(title)
+
+    def delete(self, title):
+        sheet_id = self.ids.pop(title)
+        self.order.remove(title)
+        self.grid.pop(title, None)
+        self.worksheets.pop(title, None)
+        self.resized.discard(title)
+        if title in self.added:
+            self.added.remove(title)
+        else:
+            self.deleted.append(sheet_id)
+
+    def move(self, title, index):
+        """Move tab to index; returns False if it is already there"""
+        if self.order.index(title) == index:
+            return False
+        self.order.remove(title)
+        self.order.insert(index, title)
+        self.moves.append((title, index))
+        return True
+
+    def fit(self, title, rows, cols):
+        """Grow the tab grid so that rows x cols fits (never shrinks)"""
+        grid = self.grid[title]
+        if grid[0] >= rows and grid[1] >= cols:
+            return
+        grid[0] = max(grid[0], rows)
+        grid[1] = max(grid[1], cols)
+        if title not in self.added:
+            self.resized.add(title)
+
+    def commit(self):
+        """Send all pending structural changes as one batch_update"""
+        requests = [{"deleteSheet": {"sheetId": sheet_id}} for sheet_id in self.deleted]
+        for title in self.added:
+            rows, cols = self.grid[title]
+            requests.append({"addSheet": {"properties": {
+                "sheetId": self.ids[title],
+                "title": title,
+                "gridProperties": {"rowCount": rows, "columnCount": cols},
+            }}})
+        for title, index in self.moves:
+            requests.append({"updateSheetProperties": {
+                "properties": {"sheetId": self.ids[title], "index": index},
+                "fields": "index",
+            }})
+        for title in self.resized:
+            rows, cols = self.grid[title]
+            requests.append({"updateSheetProperties": {
+                "properties": {"sheetId": self.ids[title], "gridProperties": {
+                    "rowCount": rows, "columnCount": cols,
+                }},
+                "fields": "gridProperties.rowCount,gridProperties.columnCount",
+            }})
+
+        if requests:
+            resp = scheduler.write_once(self.ss.batch_update, {"requests": requests})
+            for reply in resp.get("replies", []):
+                if "addSheet" in reply:
+                    props = reply["addSheet"]["properties"]
+                    self.worksheets[props["title"]] = _worksheet_from_properties(self.ss, props)
+                    print(f"✅ Created tab '{props['title']}'")
+            print(f"✅ Applied {len(requests)} tab changes in one batch")
+
+        self.added = []
+        self.deleted = []
+        self.moves = []
+        self.resized = set()
+
+
+_models = {}  # spreadsheet id -> SpreadsheetModel
+
+
+def get_model(ss):
+    """Get the cached SpreadsheetModel for a spreadsheet (loaded on first use)"""
+    if ss.id not in _models:
+        _models[ss.id] = SpreadsheetModel(ss)
+    return _models[ss.id]
+
+
+def commit_tabs(ss):
+    """Send pending tab adds/deletes/moves/resizes for a spreadsheet"""
+    get_model(ss).commit()
+
+
+def add_missing_tabs(ss, tab_names):
+    """Record tabs that don't exist yet; they are created on the next commit"""
+    model = get_model(ss)
+    for tab_name in tab_names:
+        if not model.has(tab_name):
+            model.add(tab_name, rows=500, cols=20)
+            print(f"📝 Tab '{tab_name}' will be created")
+
+
+def ensure_tab(ss, tab_name: str):
+    """Get or create worksheet (commits pending tab changes if it is new)"""
+    model = get_model(ss)
+    if model.get(tab_name) is None:
+        add_missing_tabs(ss, [tab_name])
+        model.commit()
+    else:
         print(f"✅ Tab '{tab_name}' exists")
+    return model.get(tab_name)
+
+
+def ensure_config_tab(ss):
+    """Get config tab, creating it with example format if it doesn't exist"""
+    model = get_model(ss)
+    ws = model.get(TAB_CONFIG)
+    if ws is not None:
+        print(f"✅ Config tab exists")
         return ws
-    except:
-        ws = ss.add_worksheet(title=tab_name, rows=500, cols=20)
-        print(f"✅ Created tab '{tab_name}'")
-        return ws
+
+    print(f"📝 Creating config tab with example format...")
+    model.add(TAB_CONFIG, rows=100, cols=4)
+    model.commit()
+    ws = model.get(TAB_CONFIG)
+    scheduler.write(ws.update, range_name="A1", values=CONFIG_EXAMPLE)
+    print(f"✅ Config tab created with example data")
+    return ws
+
+
+def read_config_rows(ss):
+    """Read all rows of the config tab (created first if missing)"""
+    ws = ensure_config_tab(ss)
+    return scheduler.read(ws.get_all_values)
 
 
 def delete_tab_if_exists(ss, tab_name: str):
-    """Delete a tab if it exists"""
-    try:
-        ws = ss.worksheet(tab_name)
-        ss.del_worksheet(ws)
-        print(f"🗑️ Deleted old tab '{tab_name}'")
-    except:
+    """Delete a tab if it exists (deleted on next commit)"""
+    model = get_model(ss)
+    if model.has(tab_name):
+        model.delete(tab_name)
+        print(f"🗑️ Old tab '{tab_name}' will be deleted")
+    else:
         print(f"ℹ️ Tab '{tab_name}' doesn't exist (nothing to delete)")
 
 
-def write_table(ws, data):
-    """Write data with header to worksheet (clears existing data)"""
-    ws.clear()
-    ws.update(range_name="A1", values=data)
-    print(f"✅ Written {len(data)} rows to '{ws.title}'")
+def write_table(ws, data, priority=PRIORITY_DATA):
+    """
+    Queue data with header for worksheet
+    On flush the data is written from A1 first, then only the cells outside
+    it (rows below, columns to the right) are cleared
+    """
+    cols = max((len(r) for r in data), default=0)
+    get_model(ws.spreadsheet).fit(ws.title, len(data), cols)
+    scheduler.queue_table(ws, data, priority)
+
+
+def discard_spreadsheet(ss):
+    """Forget a spreadsheet's tab model and queued writes (after a failure)"""
+    _models.pop(ss.id, None)
+    scheduler.discard(ss)
+
+
+def flush_writes():
+    """
+    Send pending tab changes, then all queued table writes to Google Sheets
+    Returns: set of spreadsheet ids that failed
+    """
+    failed = set()
+    for ss_id, model in _models.items():
+        try:
+            model.commit()
+        except Exception as e:
+            print(f"❌ Tab changes for spreadsheet {ss_id} failed: {e}")
+            failed.add(ss_id)
+    return scheduler.flush(failed)
+
+
+def read_tables(ss, titles):
+    """Read several tabs in one request (unformatted values) -> {title: rows}"""
+    ranges = [absolute_range_name(title) for title in titles]
+    resp = scheduler.read(ss.values_batch_get, ranges, params={"valueRenderOption": "UNFORMATTED_VALUE"})
+    value_ranges = resp.get("valueRanges", [])
+    return {title: vr.get("values", []) for title, vr in zip(titles, value_ranges)}
 
 
 def append_rows(ws, rows):
-    """Append rows to existing worksheet"""
-    ws.append_rows(rows, value_input_option="USER_ENTERED")
-    print(f"✅ Appended {len(rows)} rows to '{ws.title}'")
+    """Queue rows to append to existing worksheet (sent after the table writes on flush)"""
+    scheduler.queue_append(ws, rows)
 
 
 def update_dashboard_crypto(ss, crypto_data):
@@ -57,7 +435,6 @@ def update_dashboard_crypto(ss, crypto_data):
     from config import TAB_DASHBOARD_CRYPTO
 
     ws = ensure_tab(ss, TAB_DASHBOARD_CRYPTO)
-    ws.clear()
 
     header = crypto_data[0] if crypto_data else []
     rows = crypto_data[1:] if len(crypto_data) > 1 else []
@@ -106,7 +483,7 @@ def update_dashboard_crypto(ss, crypto_data):
     else:
         dashboard_content.append(["No crypto data available"])
 
-    write_table(ws, dashboard_content)
+    write_table(ws, dashboard_content, PRIORITY_DASHBOARD)
     print(f"✅ Dashboard_Crypto updated: {len(rows)} signals from {len(symbol_signals) if rows else 0} unique symbols")
 
 
@@ -117,7 +494,6 @@ def update_dashboard_stock_tw(ss, stock_tw_data):
     from config import TAB_DASHBOARD_STOCK_TW
 
     ws = ensure_tab(ss, TAB_DASHBOARD_STOCK_TW)
-    ws.clear()
 
     header = stock_tw_data[0] if stock_tw_data else []
     rows = stock_tw_data[1:] if len(stock_tw_data) > 1 else []
@@ -168,7 +544,7 @@ def update_dashboard_stock_tw(ss, stock_tw_data):
     else:
         dashboard_content.append(["No Taiwan stock data available"])
 
-    write_table(ws, dashboard_content)
+    write_table(ws, dashboard_content, PRIORITY_DASHBOARD)
     print(f"✅ Dashboard_Stock_TW updated: {len(rows)} signals from {len(symbol_signals) if rows else 0} unique symbols")
 
 
@@ -179,7 +555,6 @@ def update_dashboard_stock_vn(ss, stock_vn_data):
     from config import TAB_DASHBOARD_STOCK_VN
 
     ws = ensure_tab(ss, TAB_DASHBOARD_STOCK_VN)
-    ws.clear()
 
     header = stock_vn_data[0] if stock_vn_data else []
     rows = stock_vn_data[1:] if len(stock_vn_data) > 1 else []
@@ -230,5 +605,5 @@ def update_dashboard_stock_vn(ss, stock_vn_data):
     else:
         dashboard_content.append(["No Vietnam stock data available"])
 
-    write_table(ws, dashboard_content)
+    write_table(ws, dashboard_content, PRIORITY_DASHBOARD)
     print(f"✅ Dashboard_Stock_VN updated: {len(rows)} signals from {len(symbol_signals) if rows else 0} unique symbols")
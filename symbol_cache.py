@@ -0,0 +1,134 @@
+# symbol_cache.py
+"""
+Symbol resolution cache
+Remembers which (symbol, exchange, screener) combinations resolve on
+TradingView and their canonical EXCHANGE:SYMBOL form. Entries that fail
+are put in a negative cache and only re-checked after an exponentially
+growing interval, so misconfigured tickers stop costing requests.
+"""
+from datetime import datetime, timedelta
+
+from config import NEGATIVE_CACHE_BASE_HOURS, NEGATIVE_CACHE_MAX_HOURS, TS_FORMAT
+from refresh_priority import entry_key
+
+CACHE_HEADER = [
+    "Symbol", "Exchange", "Screener", "Status", "Canonical",
+    "Failures", "Last Checked", "Next Check", "Last Error"
+]
+UNRESOLVED_HEADER = [
+    "Symbol", "Name", "Exchange", "Screener",
+    "Failures", "Last Checked", "Next Check", "Last Error"
+]
+
+STATUS_OK = "OK"
+STATUS_BAD = "BAD"
+
+
+def cache_key(symbol, exchange, screener):
+    """(symbol, exchange, screener) part of entry_key, shared by every per-entry map"""
+    return entry_key(symbol, exchange, screener, "")[:3]
+
+
+def canonical_symbol(symbol, exchange):
+    """EXCHANGE:SYMBOL form (symbols that already carry a prefix are kept)"""
+    symbol = symbol.strip().upper()
+    return symbol if ":" in symbol else f"{exchange.strip().upper()}:{symbol}"
+
+
+def _parse_ts(value):
+    try:
+        return datetime.strptime(str(value), TS_FORMAT)
+    except ValueError:
+        return None
+
+
+class SymbolCache:
+    """In-memory view of the 'symbol_cache' tab"""
+
+    def __init__(self, all_rows):
+        self.entries = {}
+        for row in all_rows[1:]:
+            row = list(row) + [""] * (len(CACHE_HEADER) - len(row))
+            if not row[0]:
+                continue
+            try:
+                failures = int(float(row[5] or 0))
+            except ValueError:
+                failures = 0
+            self.entries[cache_key(str(row[0]), str(row[1]), str(row[2]))] = {
+                "status": row[3],
+                "canonical": row[4],
+                "failures": failures,
+                "last_checked": str(row[6]),
+                "next_check": str(row[7]),
+                "last_error": str(row[8]),
+            }
+
+    def merge(self, other):
+        """Merge another cache, keeping the most recently checked entry per key"""
+        for key, entry in other.entries.items():
+            mine = self.entries.get(key)
+            if mine is None or entry["last_checked"] > mine["last_checked"]:
+                self.entries[key] = entry
+
+    def should_try(self, symbol, exchange, screener, now):
+        """False while a known-bad entry is waiting for its re-check time"""
+        entry = self.entries.get(cache_key(symbol, exchange, screener))
+        if entry is None or entry["status"] != STATUS_BAD:
+            return True
+        next_check = _parse_ts(entry["next_check"])
+        return next_check is None or now >= next_check
+
+    def mark_ok(self, symbol, exchange, screener, now):
+        self.entries[cache_key(symbol, exchange, screener)] = {
+            "status": STATUS_OK,
+            "canonical": canonical_symbol(symbol, exchange),
+            "failures": 0,
+            "last_checked": now.strftime(TS_FORMAT),
+            "next_check": "",
+            "last_error": "",
+        }
+
+    def mark_bad(self, symbol, exchange, screener, error, now):
+        key = cache_key(symbol, exchange, screener)
+        prev = self.entries.get(key)
+        failures = prev["failures"] + 1 if prev and prev["status"] == STATUS_BAD else 1
+        wait_hours = min(NEGATIVE_CACHE_MAX_HOURS, NEGATIVE_CACHE_BASE_HOURS * 2 ** (failures - 1))
+        self.entries[key] = {
+            "status": STATUS_BAD,
+            "canonical": "",
+            "failures": failures,
+            "last_checked": now.strftime(TS_FORMAT),
+            "next_check": (now + timedelta(hours=wait_hours)).strftime(TS_FORMAT),
+            "last_error": str(error)[:100],
+        }
+        print(f"🚫 {symbol} ({exchange}/{screener}) unresolved, re-check in {wait_hours}h")
+
+    def table(self, config_entries=None):
+        """Rows for the 'symbol_cache' tab, limited to config_entries if given"""
+        keys = None
+        if config_entries is not None:
+            keys = {cache_key(symbol, exchange, screener) for symbol, _, exchange, screener in config_entries}
+        data = [CACHE_HEADER]
+        for (symbol, exchange, screener), e in sorted(self.entries.items()):
+            if keys is not None and (symbol, exchange, screener) not in keys:
+                continue
+            data.append([
+                symbol, exchange, screener, e["status"], e["canonical"],
+                e["failures"], e["last_checked"], e["next_check"], e["last_error"]
+            ])
+        return data
+
+    def unresolved_report(self, config_entries):
+        """Rows for the 'unresolved' tab: config entries currently known bad"""
+        data = [UNRESOLVED_HEADER]
+        for symbol, name, exchange, screener in config_entries:
+            e = self.entries.get(cache_key(symbol, exchange, screener))
+            if e and e["status"] == STATUS_BAD:
+                data.append([
+                    symbol, name, exchange, screener,
+                    e["failures"], e["last_checked"], e["next_check"], e["last_error"]
+                ])
+        if len(data) == 1:
+            data.append(["All config rows resolved"])
+        return data
@@ -0,0 +1,74 @@
+from history_log import (
+    SNAPSHOT_HEADER, has_changed, load_snapshot, select_changes, snapshot_table
+)
+from refresh_priority import entry_key
+
+TS = "2026-01-01 12:00"
+
+
+def make_row(symbol="BTCUSDT", tf="1D", price=100.0, signal="✅ HOLD", confidence=60,
+             exchange="BINANCE", screener="crypto"):
+    row = [symbol, "Bitcoin", tf, price, 50, 0, 0, "BULL", "BULLISH", signal, confidence,
+           0, 0, 0, 0, 0, TS, "LIVE", exchange, screener]
+    return row
+
+
+def prev_state(price=100.0, signal="✅ HOLD", confidence=60):
+    return {"asset_type": "CRYPTO", "price": price, "signal": signal, "confidence": confidence, "time": TS}
+
+
+def test_has_changed():
+    assert has_changed(None, 100, "✅ HOLD", 60)
+    assert not has_changed(prev_state(), 100.4, "✅ HOLD", 60, tolerance_pct=0.5)
+    assert has_changed(prev_state(), 100.6, "✅ HOLD", 60, tolerance_pct=0.5)
+    assert has_changed(prev_state(), 100, "📉 DIP BUY", 60)
+    assert has_changed(prev_state(), 100, "✅ HOLD", 75)
+    assert has_changed(prev_state(price=0), 100, "✅ HOLD", 60)
+
+
+def test_unchanged_rows_are_not_logged_again():
+    snapshot = {}
+    rows = [make_row()]
+    history, _ = select_changes(rows, "CRYPTO", snapshot, TS)
+    assert len(history) == 1
+
+    history, transitions = select_changes(rows, "CRYPTO", snapshot, "2026-01-01 16:00")
+    assert history == [] and transitions == []
+
+
+def test_signal_flip_emits_transition():
+    snapshot = {entry_key("BTCUSDT", "BINANCE", "crypto", "1D"): prev_state()}
+    history, transitions = select_changes([make_row(signal="📉 DIP BUY", confidence=75)], "CRYPTO", snapshot, TS)
+
+    assert len(history) == 1
+    assert transitions[0][5:9] == ["✅ HOLD", "📉 DIP BUY", 60, 75]
+    assert snapshot[entry_key("BTCUSDT", "BINANCE", "crypto", "1D")]["signal"] == "📉 DIP BUY"
+
+
+def test_error_rows_are_skipped():
+    row = make_row(tf="ERROR")
+    assert select_changes([row], "CRYPTO", {}, TS) == ([], [])
+
+
+def test_same_symbol_on_two_exchanges_is_tracked_separately():
+    snapshot = {}
+    rows = [make_row(exchange="BINANCE"), make_row(exchange="BYBIT", price=101.0)]
+    history, _ = select_changes(rows, "CRYPTO", snapshot, TS)
+    assert len(history) == 2
+
+    history, _ = select_changes(rows, "CRYPTO", snapshot, TS)
+    assert history == []
+
+
+def test_snapshot_round_trip():
+    snapshot = {}
+    select_changes([make_row(), make_row(tf="1W")], "CRYPTO", snapshot, TS)
+    table = snapshot_table(snapshot)
+
+    assert table[0] == SNAPSHOT_HEADER
+    assert load_snapshot(table) == snapshot
+
+
+def test_snapshot_rows_without_exchange_are_dropped():
+    old = [["Symbol", "TF", "Price"], ["BTCUSDT", "1D", 100]]
+    assert load_snapshot(old) == {}
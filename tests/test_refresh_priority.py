@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+from config import REFRESH_TIER_MAX_AGE_HOURS, TS_FORMAT
+from refresh_priority import (
+    COL_UPDATED, COL_EXCHANGE, COL_SCREENER, STATUS_LIVE,
+    entry_key, assign_tier, plan_refresh, load_previous_rows
+)
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def make_row(tf="1D", close=100.0, rsi=50.0, confidence=0, ema20=100.0, ema200=80.0,
+             s1=50.0, r1=200.0, age=None, symbol="BTCUSDT", exchange="BINANCE", screener="crypto"):
+    """Data row in HEADER layout; neutral (no hot factor) by default"""
+    updated = (NOW - timedelta(hours=age)).strftime(TS_FORMAT) if age is not None else ""
+    return [
+        symbol, "Bitcoin", tf, close, rsi, 0, 0, "BULL", "BULLISH", "✅ HOLD", confidence,
+        ema20, ema200, 0, s1, r1, updated, STATUS_LIVE, exchange, screener,
+    ]
+
+
+def test_never_seen_entry_is_tier_1():
+    assert assign_tier("1W", None) == 1
+
+
+def test_neutral_row_keeps_timeframe_tier():
+    assert assign_tier("4H", make_row("4H")) == 1
+    assert assign_tier("1D", make_row("1D")) == 2
+    assert assign_tier("1W", make_row("1W")) == 3
+
+
+def test_rsi_counts_only_on_the_triggering_side():
+    # Just above 30 is about to trigger EXTREME VALUE (< 30)
+    assert assign_tier("1W", make_row("1W", rsi=31)) == 2
+    # Just below 30 has already crossed it (and is outside the other bands)
+    assert assign_tier("1W", make_row("1W", rsi=28)) == 3
+    # Just below 70 is about to trigger EXIT ZONE (> 70)
+    assert assign_tier("1W", make_row("1W", rsi=69)) == 2
+    assert assign_tier("1W", make_row("1W", rsi=73)) == 3
+
+
+def test_price_near_s1_trigger_only_from_above():
+    trigger = 90 * 1.02
+    assert assign_tier("1W", make_row("1W", close=trigger * 1.005, s1=90, ema20=trigger, ema200=50)) == 2
+    assert assign_tier("1W", make_row("1W", close=trigger * 0.995, s1=90, ema20=trigger, ema200=50)) == 3
+
+
+def test_hot_factors_stack_but_never_below_tier_1():
+    row = make_row("1W", rsi=31, confidence=90, ema20=80.0)
+    assert assign_tier("1W", row) == 1
+
+
+def test_fresh_entries_are_not_due():
+    keys = [entry_key("BTCUSDT", "BINANCE", "crypto", "1W")]
+    previous = {keys[0]: make_row("1W", age=1)}
+    assert plan_refresh(keys, previous, NOW) == set()
+
+
+def test_tier_1_is_due_every_run():
+    assert REFRESH_TIER_MAX_AGE_HOURS[1] > 0
+    keys = [entry_key("BTCUSDT", "BINANCE", "crypto", "4H")]
+    previous = {keys[0]: make_row("4H", age=4)}
+    assert plan_refresh(keys, previous, NOW) == set(keys)
+
+
+def test_never_seen_entries_come_first():
+    seen = entry_key("BTCUSDT", "BINANCE", "crypto", "4H")
+    new = entry_key("ETHUSDT", "BINANCE", "crypto", "1W")
+    previous = {seen: make_row("4H", age=100)}
+    assert plan_refresh([seen, new], previous, NOW, budget=1) == {new}
+
+
+def test_overdue_cold_tier_ages_into_the_budget():
+    hot = entry_key("BTCUSDT", "BINANCE", "crypto", "4H")
+    cold = entry_key("BTCUSDT", "BINANCE", "crypto", "1W")
+    max_hot = REFRESH_TIER_MAX_AGE_HOURS[1]
+    max_cold = REFRESH_TIER_MAX_AGE_HOURS[3]
+    previous = {
+        hot: make_row("4H", age=max_hot * 1.5),
+        cold: make_row("1W", age=max_cold * 3),
+    }
+    assert plan_refresh([hot, cold], previous, NOW, budget=1) == {cold}
+
+
+def test_same_symbol_on_two_exchanges_is_planned_separately():
+    keys = [
+        entry_key("BTCUSDT", "BINANCE", "crypto", "1D"),
+        entry_key("BTCUSDT", "BYBIT", "crypto", "1D"),
+    ]
+    assert plan_refresh(keys, {}, NOW) == set(keys)
+
+
+def test_load_previous_rows_maps_old_layout_by_header():
+    header = ["Symbol", "Name", "TF"]
+    old_rows = [header, ["BTCUSDT", "Bitcoin", "1D"], ["ETHUSDT", "Ether", "1D"]]
+    full_header = [f"c{i}" for i in range(20)]
+    full_header[0:3] = header
+    full_header[COL_EXCHANGE] = "Exchange"
+    full_header[COL_SCREENER] = "Screener"
+
+    previous = load_previous_rows(old_rows, full_header, {"BTCUSDT": ("BINANCE", "crypto")})
+
+    assert list(previous) == [entry_key("BTCUSDT", "BINANCE", "crypto", "1D")]
+    assert previous[entry_key("BTCUSDT", "BINANCE", "crypto", "1D")][COL_UPDATED] == ""
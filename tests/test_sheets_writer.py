@@ -0,0 +1,138 @@
+import pytest
+
+pytest.importorskip("gspread")
+pytest.importorskip("google.oauth2")
+
+from gspread.exceptions import APIError  # noqa: E402
+
+import sheets_writer  # noqa: E402
+from sheets_writer import RequestScheduler, SlidingWindowLimiter, SpreadsheetModel  # noqa: E402
+
+try:
+    # gspread 6.x Worksheets require an HTTPClient instance (never used here)
+    from gspread.http_client import HTTPClient
+    CLIENT = HTTPClient.__new__(HTTPClient)
+except ImportError:
+    CLIENT = None
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status_code = status
+        self.text = f"error {status}"
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text, "status": "ERROR"}}
+
+
+class Flaky:
+    """Callable that raises APIError(status) for the first `failures` calls"""
+
+    def __init__(self, status, failures=1):
+        self.status = status
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise APIError(FakeResponse(self.status))
+        return "ok"
+
+
+class FakeSpreadsheet:
+    id = "sheet"
+    client = CLIENT
+
+    def __init__(self, titles):
+        self.props = [
+            {"sheetId": i, "title": t, "index": i, "gridProperties": {"rowCount": 10, "columnCount": 5}}
+            for i, t in enumerate(titles)
+        ]
+        self.batches = []
+
+    def worksheets(self):
+        return [sheets_writer._worksheet_from_properties(self, p) for p in self.props]
+
+    def batch_update(self, body):
+        self.batches.append(body["requests"])
+        return {"replies": [
+            {"addSheet": {"properties": r["addSheet"]["properties"]}} if "addSheet" in r else {}
+            for r in body["requests"]
+        ]}
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(sheets_writer.time, "sleep", lambda seconds: None)
+
+
+def test_sliding_window_never_exceeds_quota_in_first_minute():
+    clock = [0.0]
+
+    def sleep(seconds):
+        clock[0] += seconds
+
+    limiter = SlidingWindowLimiter(3, clock=lambda: clock[0], sleep=sleep)
+    stamps = []
+    for _ in range(7):
+        limiter.take()
+        stamps.append(clock[0])
+        clock[0] += 1
+
+    assert stamps == [0, 1, 2, 60, 61, 62, 120]
+    for start in stamps:
+        assert sum(start <= s < start + 60 for s in stamps) <= 3
+
+
+def test_write_retries_5xx(no_sleep):
+    fn = Flaky(503, failures=2)
+    assert RequestScheduler(max_retries=3).write(fn) == "ok"
+    assert fn.calls == 3
+
+
+def test_write_once_does_not_retry_5xx(no_sleep):
+    fn = Flaky(503)
+    with pytest.raises(APIError):
+        RequestScheduler(max_retries=3).write_once(fn)
+    assert fn.calls == 1
+
+
+def test_write_once_retries_429(no_sleep):
+    fn = Flaky(429)
+    assert RequestScheduler(max_retries=3).write_once(fn) == "ok"
+    assert fn.calls == 2
+
+
+def test_retries_are_bounded(no_sleep):
+    fn = Flaky(429, failures=10)
+    with pytest.raises(APIError):
+        RequestScheduler(max_retries=2).write(fn)
+    assert fn.calls == 3
+
+
+def test_non_retryable_status_raises_immediately(no_sleep):
+    fn = Flaky(400)
+    with pytest.raises(APIError):
+        RequestScheduler(max_retries=3).read(fn)
+    assert fn.calls == 1
+
+
+def test_model_commit_sends_one_batch():
+    ss = FakeSpreadsheet(["Sheet1", "old", "Crypto"])
+    model = SpreadsheetModel(ss)
+
+    model.delete("old")
+    model.add("history")
+    model.move("history", 0)
+    model.fit("Crypto", 50, 5)
+    model.commit()
+
+    assert len(ss.batches) == 1
+    kinds = [next(iter(r)) for r in ss.batches[0]]
+    assert kinds == ["deleteSheet", "addSheet", "updateSheetProperties", "updateSheetProperties"]
+    assert model.get("history").title == "history"
+    assert model.order == ["history", "Sheet1", "Crypto"]
+
+    model.commit()
+    assert len(ss.batches) == 1
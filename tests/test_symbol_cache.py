@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from config import NEGATIVE_CACHE_BASE_HOURS, NEGATIVE_CACHE_MAX_HOURS
+from symbol_cache import CACHE_HEADER, STATUS_BAD, SymbolCache, cache_key, canonical_symbol
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def test_unknown_symbol_is_tried():
+    assert SymbolCache([]).should_try("BTCUSDT", "BINANCE", "crypto", NOW)
+
+
+def test_bad_symbol_waits_for_exponential_recheck():
+    cache = SymbolCache([])
+    now = NOW
+    for failures in range(1, 6):
+        cache.mark_bad("NOPE", "BINANCE", "crypto", "not found", now)
+        wait = min(NEGATIVE_CACHE_MAX_HOURS, NEGATIVE_CACHE_BASE_HOURS * 2 ** (failures - 1))
+
+        assert cache.entries[cache_key("NOPE", "BINANCE", "crypto")]["failures"] == failures
+        assert not cache.should_try("NOPE", "BINANCE", "crypto", now + timedelta(hours=wait - 1))
+        now += timedelta(hours=wait)
+        assert cache.should_try("NOPE", "BINANCE", "crypto", now)
+
+
+def test_recheck_interval_is_capped():
+    cache = SymbolCache([])
+    for _ in range(20):
+        cache.mark_bad("NOPE", "BINANCE", "crypto", "not found", NOW)
+    assert cache.should_try("NOPE", "BINANCE", "crypto", NOW + timedelta(hours=NEGATIVE_CACHE_MAX_HOURS))
+
+
+def test_mark_ok_resets_failures():
+    cache = SymbolCache([])
+    cache.mark_bad("BTCUSDT", "BINANCE", "crypto", "timeout", NOW)
+    cache.mark_ok("BTCUSDT", "BINANCE", "crypto", NOW)
+
+    entry = cache.entries[cache_key("BTCUSDT", "BINANCE", "crypto")]
+    assert entry["failures"] == 0 and entry["canonical"] == "BINANCE:BTCUSDT"
+    assert cache.should_try("BTCUSDT", "BINANCE", "crypto", NOW)
+
+
+def test_keys_are_normalized():
+    assert cache_key("binance:btcusdt ", " binance", "Crypto") == ("BTCUSDT", "BINANCE", "crypto")
+    assert canonical_symbol("OANDA:XAUUSD", "FX") == "OANDA:XAUUSD"
+
+
+def test_table_round_trip_and_subset():
+    cache = SymbolCache([])
+    cache.mark_bad("NOPE", "BINANCE", "crypto", "not found", NOW)
+    cache.mark_ok("2330", "TWSE", "taiwan", NOW)
+
+    loaded = SymbolCache(cache.table())
+    assert loaded.entries == cache.entries
+    assert loaded.entries[cache_key("NOPE", "BINANCE", "crypto")]["status"] == STATUS_BAD
+
+    subset = cache.table([("2330", "TSMC", "TWSE", "taiwan")])
+    assert subset[0] == CACHE_HEADER
+    assert [row[0] for row in subset[1:]] == ["2330"]
+
+
+def test_merge_keeps_most_recent_check():
+    older = SymbolCache([])
+    older.mark_bad("NOPE", "BINANCE", "crypto", "not found", NOW)
+    newer = SymbolCache([])
+    newer.mark_ok("NOPE", "BINANCE", "crypto", NOW + timedelta(hours=1))
+
+    older.merge(newer)
+    assert older.should_try("NOPE", "BINANCE", "crypto", NOW)
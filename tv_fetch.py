@@ -1,6 +1,11 @@
 # tv_fetch.py
 from tradingview_ta import TA_Handler, Interval
 
+
+class SymbolNotFoundError(Exception):
+    """TradingView has no data for this symbol/exchange/screener combination"""
+
+
 def _fetch(symbol: str, exchange: str, screener: str, interval: Interval) -> dict:
     """Fetch single timeframe data with error handling"""
     try:
@@ -37,6 +42,8 @@ def _fetch(symbol: str, exchange: str, screener: str, interval: Interval) -> dic
             "RECOMMENDATION": a.summary.get("RECOMMENDATION"),
         }
     except Exception as e:
+        if "not found" in str(e).lower():
+            raise SymbolNotFoundError(f"{exchange}:{symbol} ({screener}): {e}") from e
         print(f"❌ Fetch error {symbol} {interval}: {e}")
         return {}
 
@@ -45,6 +52,8 @@ def fetch_multi_timeframes(symbol: str, exchange: str, screener: str, timeframes
     """
     Fetch data for multiple timeframes
     Supported: 1M, 5M, 15M, 30M, 1H, 2H, 4H, 1D, 1W, 1M (month)
+    Raises SymbolNotFoundError on the first timeframe if the symbol doesn't
+    resolve, so dead tickers cost a single request
     """
     # === ONLY USE SUPPORTED INTERVALS ===
     interval_map = {